@@ -1,83 +1,356 @@
+import io
+import os
+
+# 컨테이너 배포에선 OpenMP 스레드가 1개로 잠기는 경우가 있어
+# sklearn 임포트 전에 코어 수만큼 풀어준다
+os.environ.setdefault('OMP_NUM_THREADS', str(max(1, os.cpu_count() or 1)))
+
 import streamlit as st
 from PIL import Image
 import numpy as np
-from sklearn.cluster import KMeans
+from sklearn.cluster import MiniBatchKMeans
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
-import os
+
+try:
+    from numba import njit, prange
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+try:
+    # CUDA 장비가 있으면 cuML의 GPU KMeans 사용 (sklearn과 동일 API)
+    from cuml.cluster import KMeans as CuKMeans
+    _HAS_CUML = True
+except Exception:
+    _HAS_CUML = False
+
+try:
+    # OpenCV가 있으면 libjpeg-turbo(SIMD) 디코더 사용
+    import cv2
+    _HAS_CV2 = True
+except ImportError:
+    _HAS_CV2 = False
 
 # --- 1. 페이지 설정 ---
 st.set_page_config(page_title="우주 색소 에너지 분석기", layout="wide")
 
 # --- 2. 한글 폰트 설정 ---
+@st.cache_resource
 def setup_korean_font():
-    font_found = False
+    # ttflist 전체 스캔은 비싸므로 세션당 한 번만 실행
+    family = None
     for font in fm.fontManager.ttflist:
         if 'Nanum' in font.name:
-            plt.rc('font', family=font.name)
-            font_found = True
+            family = font.name
             break
-    if not font_found:
+    if family is None:
         if os.name == 'nt':  # Windows
-            plt.rc('font', family='Malgun Gothic')
+            family = 'Malgun Gothic'
         elif os.name == 'posix':  # Mac/Linux
-            plt.rc('font', family='AppleGothic')
+            family = 'AppleGothic'
+    if family is not None:
+        plt.rc('font', family=family)
     plt.rcParams['axes.unicode_minus'] = False
+    return family
 
 setup_korean_font()
 
 # --- 3. 과학 상수 및 계산 함수 ---
 H_PLANCK = 6.626e-34
 C_LIGHT = 3.00e8
-EV_PER_JOULE = 6.242e18 
-
-def rgb_to_wavelength(rgb):
-    """RGB -> 파장(nm) 근사 변환"""
-    r, g, b = rgb[0], rgb[1], rgb[2]
-    if r > g and r > b: # Reddish
-        wavelength = 620 + (130 * (r/255))
-    elif g > r and g > b: # Greenish
-        wavelength = 495 + (125 * (g/255))
-    elif b > r and b > g: # Blueish
-        wavelength = 380 + (115 * (b/255))
-    else:
-        wavelength = 550 
-    return max(380, min(750, wavelength))
+EV_PER_JOULE = 6.242e18
+_E_COEFF = H_PLANCK * C_LIGHT * EV_PER_JOULE * 1e9  # eV·nm
+
+def rgb_to_wavelength(centers):
+    """RGB 배열 (k,3) -> 파장(nm) 근사 변환 (벡터 연산)"""
+    c = centers / 255.0
+    dom = np.argmax(centers, axis=1)
+    w = np.where(dom == 0, 620 + 130 * c[:, 0],        # Reddish
+        np.where(dom == 1, 495 + 125 * c[:, 1],        # Greenish
+                 380 + 115 * c[:, 2]))                 # Blueish
+    # 최대 채널이 둘 이상이면(무채색 계열) 중간 파장으로 처리
+    tie = (centers == centers.max(axis=1, keepdims=True)).sum(axis=1) > 1
+    w = np.where(tie, 550.0, w)
+    return np.clip(w, 380, 750)
 
 def calculate_photon_energy(wavelength_nm):
-    """파장(nm) -> 에너지(eV)"""
-    wavelength_m = wavelength_nm * 1e-9
-    energy_joule = (H_PLANCK * C_LIGHT) / wavelength_m
-    return energy_joule * EV_PER_JOULE
-
-def analyze_colors(image, k, resize_val):
-    img = image.resize((resize_val, resize_val))
-    img_array = np.array(img)
-    img_array = img_array.reshape((img_array.shape[0] * img_array.shape[1], 3))
-    
-    clt = KMeans(n_clusters=k, n_init=10, random_state=42)
-    clt.fit(img_array)
-    
-    numLabels = np.arange(0, len(np.unique(clt.labels_)) + 1)
-    (hist, _) = np.histogram(clt.labels_, bins=numLabels)
-    hist = hist.astype("float")
-    hist /= hist.sum()
-    
-    return hist, clt.cluster_centers_
+    """파장(nm) -> 에너지(eV). 스칼라/배열 모두 지원"""
+    return _E_COEFF / wavelength_nm
+
+if _HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _kmeans_numba(X, weights, centers, iters):
+        """가중치 있는 Lloyd 반복. (labels, centers, 클러스터별 가중 빈도) 반환"""
+        n = X.shape[0]
+        k = centers.shape[0]
+        labels = np.zeros(n, dtype=np.int64)
+        sums = np.zeros((k, 3), dtype=np.float64)
+        wsum = np.zeros(k, dtype=np.float64)
+        for _ in range(iters):
+            # 할당 단계 (픽셀별로 병렬)
+            for i in prange(n):
+                best = 0
+                best_d = np.inf
+                for j in range(k):
+                    d = ((X[i, 0] - centers[j, 0]) ** 2
+                         + (X[i, 1] - centers[j, 1]) ** 2
+                         + (X[i, 2] - centers[j, 2]) ** 2)
+                    if d < best_d:
+                        best_d = d
+                        best = j
+                labels[i] = best
+            # 갱신 단계 (가중 평균)
+            sums[:] = 0.0
+            wsum[:] = 0.0
+            for i in range(n):
+                w = weights[i]
+                j = labels[i]
+                sums[j, 0] += w * X[i, 0]
+                sums[j, 1] += w * X[i, 1]
+                sums[j, 2] += w * X[i, 2]
+                wsum[j] += w
+            for j in range(k):
+                if wsum[j] > 0:
+                    centers[j, 0] = sums[j, 0] / wsum[j]
+                    centers[j, 1] = sums[j, 1] / wsum[j]
+                    centers[j, 2] = sums[j, 2] / wsum[j]
+        # 마지막 갱신 단계의 wsum이 곧 클러스터별 가중 빈도다
+        return labels, centers, wsum
+
+def _decode_rgb_cv2(file_bytes):
+    """cv2(libjpeg-turbo)로 디코드한 RGB ndarray. 못 읽는 포맷이면 None"""
+    data = np.frombuffer(file_bytes, np.uint8)
+    bgr = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    if bgr is None:
+        return None
+    return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
+@st.cache_data(show_spinner=False)
+def load_image_rgb(file_bytes):
+    """원본 표시용 풀 해상도 RGB ndarray. 업로드당 한 번만 디코드"""
+    if _HAS_CV2:
+        arr = _decode_rgb_cv2(file_bytes)
+        if arr is not None:
+            return arr
+    return np.asarray(Image.open(io.BytesIO(file_bytes)).convert('RGB'))
+
+@st.cache_data(show_spinner=False)
+def load_pixels(file_bytes, resize_val):
+    """업로드 바이트 -> (N,3) RGB 픽셀 배열. 디코드/추출 결과는 캐시"""
+    arr = _decode_rgb_cv2(file_bytes) if _HAS_CV2 else None
+    if arr is not None:
+        arr = arr.reshape(-1, 3)
+    else:
+        img = Image.open(io.BytesIO(file_bytes))
+        # JPEG이면 libjpeg가 1/2·1/4·1/8 스케일로 바로 디코드하도록 힌트
+        img.draft('RGB', (resize_val, resize_val))
+        arr = np.asarray(img.convert('RGB')).reshape(-1, 3)
+    # 리샘플 커널 대신 보폭 추출로 픽셀 수를 정밀도 설정(resize_val^2)에 맞춘다
+    step = max(1, arr.shape[0] // (resize_val * resize_val))
+    return np.ascontiguousarray(arr[::step])
+
+@st.cache_data(show_spinner=False)
+def analyze_colors(file_bytes, k, resize_val, fast_mode=False):
+    """업로드 바이트 -> (hist, centers). 동일 입력이면 캐시에서 즉시 반환"""
+    img_array = load_pixels(file_bytes, resize_val)
+
+    # 채널당 5비트(32768 셀) 큐브로 양자화 -> KMeans 입력이 픽셀 수와 무관하게
+    # 최대 32768개의 (고유색, 가중치) 쌍으로 줄어든다.
+    # (N,3) 열을 그대로 읽는 대신 채널별 연속 배열(SoA)로 떼어내 스트라이드-1 스윕
+    r = np.ascontiguousarray(img_array[:, 0], dtype=np.uint32)
+    g = np.ascontiguousarray(img_array[:, 1], dtype=np.uint32)
+    b = np.ascontiguousarray(img_array[:, 2], dtype=np.uint32)
+    keys = ((r >> 3) << 10) | ((g >> 3) << 5) | (b >> 3)
+    counts = np.bincount(keys, minlength=32768)
+
+    occupied = np.nonzero(counts)[0]
+    unique_colors = np.empty((occupied.size, 3), dtype=np.float32)
+    unique_colors[:, 0] = (occupied >> 10) & 31
+    unique_colors[:, 1] = (occupied >> 5) & 31
+    unique_colors[:, 2] = occupied & 31
+    unique_colors = unique_colors * 8.0 + 4.0  # 셀 중심 RGB로 복원
+    weights = counts[occupied].astype(np.float32)
+
+    # 고유색이 k개 이하면(문서·스케치 같은 저엔트로피 이미지) 군집화가 무의미 —
+    # 고유색과 빈도를 그대로 팔레트로 반환 (고속 모드도 이 경로를 공유)
+    if occupied.size <= k:
+        hist = weights / weights.sum()
+        order = np.argsort(hist)[::-1]
+        return hist[order], unique_colors[order]
+
+    if fast_mode:
+        # KMeans 없이 실제 점유된 셀 중 상위 k개를 그대로 팔레트로 사용
+        top = np.argpartition(weights, -k)[-k:]
+        hist = weights[top] / weights.sum()
+        order = np.argsort(hist)[::-1]
+        return hist[order], unique_colors[top][order]
+
+    if _HAS_CUML and unique_colors.shape[0] > k:
+        # cuML은 float32 입력을 요구한다 (unique_colors는 이미 float32)
+        clt = CuKMeans(n_clusters=k, n_init=1, max_iter=50, random_state=42)
+        clt.fit(unique_colors, sample_weight=weights)
+        labels = clt.predict(unique_colors)
+        centers = np.asarray(clt.cluster_centers_)
+        # 빈 클러스터가 있어도 k개의 빈도가 모두 나오도록 bincount 사용
+        hist = np.bincount(labels, weights=weights, minlength=k)
+    elif _HAS_NUMBA and unique_colors.shape[0] > k:
+        # numba가 있으면 JIT 컴파일된 가중 Lloyd 커널 사용
+        # (갱신 단계가 가중 빈도를 이미 누적하므로 별도 bincount가 필요 없다)
+        rng = np.random.default_rng(42)
+        init = unique_colors[rng.choice(
+            unique_colors.shape[0], size=k, replace=False, p=weights / weights.sum()
+        )].copy()
+        _, centers, hist = _kmeans_numba(unique_colors, weights, init, 50)
+    else:
+        clt = MiniBatchKMeans(
+            n_clusters=k, n_init=1, batch_size=4096, max_iter=50,
+            tol=1e-3, random_state=42
+        )
+        clt.fit(unique_colors, sample_weight=weights)
+        labels = clt.predict(unique_colors)
+        centers = clt.cluster_centers_
+        # 빈 클러스터가 있어도 k개의 빈도가 모두 나오도록 bincount 사용
+        hist = np.bincount(labels, weights=weights, minlength=k)
+
+    hist = hist / hist.sum()
+
+    # 분포율 내림차순으로 정렬한 ndarray를 그대로 반환 (튜플 변환 없음)
+    order = np.argsort(hist)[::-1]
+    return hist[order], centers[order]
 
+@st.cache_data(show_spinner=False)
+def build_color_table(file_bytes, k, resize_val, fast_mode=False):
+    """분석 결과를 표시용 dict 리스트로 구조화. 정렬 토글 시엔 캐시만 읽는다"""
+    hist, centers = analyze_colors(file_bytes, k, resize_val, fast_mode)
+    centers_int = centers.astype(int)
+    wavelengths = rgb_to_wavelength(centers_int)
+    energies = calculate_photon_energy(wavelengths)
+    hex_list = [f'#{r:02x}{g:02x}{b:02x}' for r, g, b in centers_int]
+
+    data_list = []
+    for percent, color_int, wavelength, energy, hex_code in zip(
+        hist, centers_int, wavelengths, energies, hex_list
+    ):
+        data_list.append({
+            "percent": percent,
+            "color": color_int,
+            "wavelength": wavelength,
+            "energy": energy,
+            "hex": hex_code
+        })
+    return data_list
+
+@st.cache_data(show_spinner=False)
 def plot_bar(hist, centers):
     """색상 비율을 보여주는 가로 스펙트럼 바 생성"""
-    bar = np.zeros((100, 1000, 3), dtype="uint8")
-    startX = 0
     # 스펙트럼 바는 항상 분포율(%) 순서대로 그리는 것이 시각적으로 자연스럽습니다.
-    # (zip으로 묶어서 정렬)
-    zipped = sorted(zip(hist, centers), key=lambda x: x[0], reverse=True)
-    
-    for (percent, color) in zipped:
-        endX = startX + (percent * 1000)
-        bar[:, int(startX):int(endX)] = color.astype("uint8")
-        startX = endX
-    return bar
+    order = np.argsort(hist)[::-1]
+    edges = np.minimum(np.round(np.cumsum(hist[order]) * 1000).astype(int), 1000)
+    if abs(float(hist.sum()) - 1.0) < 1e-3:
+        edges[-1] = 1000  # 반올림 오차로 끝부분이 비지 않도록 보정
+    widths = np.diff(np.concatenate(([0], edges)))
+    # 합이 1에 못 미치는 분포(고속 모드 상위 k개)는 나머지를 빈 칸으로 남긴다
+    row = np.zeros((1000, 3), dtype="uint8")
+    row[:edges[-1]] = np.repeat(centers[order].astype("uint8"), widths, axis=0)
+    # 세로 방향은 브로드캐스트 뷰로 충분 — 100행을 실제로 쓰지 않는다
+    return np.broadcast_to(row, (100, 1000, 3))
+
+@st.cache_resource
+def _get_energy_fig():
+    """에너지 그래프용 Figure를 세션당 하나만 만들어 재사용"""
+    return plt.subplots(figsize=(8, 6))
+
+@st.fragment
+def render_panel(data_list, hist, centers):
+    """분석 컨트롤 패널. 정렬/탭 조작 시 이 영역만 다시 실행된다"""
+    st.subheader("📊 분석 컨트롤 패널")
+    # --- 정렬 버튼 ---
+    sort_option = st.radio(
+        "정렬 기준 선택:",
+        ("색상 분포(%) 많은 순", "에너지(eV) 높은 순"),
+        horizontal=True
+    )
+
+    # 데이터 정렬 로직
+    if sort_option == "에너지(eV) 높은 순":
+        sorted_data = sorted(data_list, key=lambda x: x['energy'], reverse=True)
+    else:
+        sorted_data = sorted(data_list, key=lambda x: x['percent'], reverse=True)
+
+    # --- 탭 구성 ---
+    tab1, tab2 = st.tabs(["⚡ 에너지 그래프", "🎨 색상 스펙트럼 & 상세"])
+
+    with tab1:
+        # [탭 1] 에너지 막대 그래프 (Figure는 재사용하고 Axes만 다시 그린다)
+        fig_bar, ax_bar = _get_energy_fig()
+        ax_bar.clear()
+        fig_bar.patch.set_facecolor('#f0f2f6')
+        ax_bar.set_facecolor('#f0f2f6')
+
+        plot_energies = [d['energy'] for d in sorted_data]
+        plot_colors = np.array([d['color'] for d in sorted_data]) / 255
+        plot_labels = [d['hex'] for d in sorted_data] # 라벨은 색상코드
+
+        y_pos = np.arange(len(sorted_data))
+        ax_bar.barh(y_pos, plot_energies, color=plot_colors, height=0.6)
+        ax_bar.set_yticks(y_pos)
+        ax_bar.set_yticklabels(plot_labels)
+        ax_bar.invert_yaxis()
+
+        ax_bar.set_xlabel("광자 에너지 (eV)")
+        ax_bar.set_title(f"색상별 에너지 ({sort_option})")
+
+        st.pyplot(fig_bar)
+
+        # 간단 요약
+        max_e = max(d['energy'] for d in data_list)
+        min_e = min(d['energy'] for d in data_list)
+        st.info(f"이 사진의 에너지 범위는 **{min_e:.2f} eV** ~ **{max_e:.2f} eV** 입니다.")
+
+    with tab2:
+        # [탭 2] 스펙트럼 바 + 상세 리스트
+        st.write("**🌈 색상 분포 스펙트럼**")
+        # 스펙트럼 바는 전체 분포를 보여주므로 항상 % 순으로 생성
+        bar_image = plot_bar(hist, centers)
+        st.image(bar_image, use_column_width=True)
+
+        st.write(f"**📝 상세 데이터 ({sort_option})**")
+
+        # 리스트 출력 (선택한 정렬 기준에 따름)
+        # 행마다 st.markdown을 호출하면 위젯 왕복이 k번 생기므로 한 번에 출력
+        rows_html = "".join(
+            f"""
+                <div style="
+                    display: flex;
+                    align-items: center;
+                    margin-bottom: 8px;
+                    padding: 10px;
+                    background-color: white;
+                    border-radius: 5px;
+                    box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
+                    <div style="
+                        width: 40px;
+                        height: 40px;
+                        background-color: {item['hex']};
+                        border: 1px solid #ddd;
+                        margin-right: 15px;
+                        border-radius: 4px;">
+                    </div>
+                    <div style="font-family: monospace; color: #333; width: 100%;">
+                        <div style="display: flex; justify-content: space-between;">
+                            <span style="font-weight: bold; font-size: 1.1em;">{item['hex']}</span>
+                            <span style="color: #666;">점유율: {item['percent']*100:.1f}%</span>
+                        </div>
+                        <div style="margin-top: 4px; font-size: 0.9em;">
+                            파장: {item['wavelength']:.1f} nm │ <span style="color: #d63031; font-weight: bold;">에너지: {item['energy']:.3f} eV</span>
+                        </div>
+                    </div>
+                </div>
+                """
+            for item in sorted_data
+        )
+        st.markdown(rows_html, unsafe_allow_html=True)
 
 # --- 4. 메인 UI 및 로직 ---
 
@@ -90,122 +363,28 @@ k_value = st.sidebar.slider("추출할 색상 개수", 3, 20, 10)
 resize_quality = st.sidebar.select_slider(
     "분석 정밀도", options=[200, 400, 600, 800], value=600
 )
+fast_mode = st.sidebar.checkbox(
+    "⚡ 고속 모드", value=False,
+    help="군집화 대신 색 히스토그램 상위 k개 셀을 사용합니다 (k가 작을 때 적합)"
+)
 
 uploaded_file = st.file_uploader("우주 이미지를 업로드하세요", type=["jpg", "jpeg", "png"])
 
 if uploaded_file is not None:
     col1, col2 = st.columns([1, 1])
-    
-    image = Image.open(uploaded_file).convert('RGB')
-    
+
+    file_bytes = uploaded_file.getvalue()
+    image_arr = load_image_rgb(file_bytes)
+
     with col1:
         st.subheader("📷 원본 이미지")
-        st.image(image, use_column_width=True)
+        st.image(image_arr, use_column_width=True)
 
     with st.spinner('광자 에너지 계산 중...'):
-        # 1. 색상 분석
-        hist, centers = analyze_colors(image, k_value, resize_quality)
-        
-        # 2. 데이터 구조화
-        data_list = []
-        for i, (percent, color) in enumerate(zip(hist, centers)):
-            color_int = color.astype(int)
-            wavelength = rgb_to_wavelength(color_int)
-            energy = calculate_photon_energy(wavelength)
-            
-            data_list.append({
-                "percent": percent,
-                "color": color_int,
-                "wavelength": wavelength,
-                "energy": energy,
-                "hex": '#{:02x}{:02x}{:02x}'.format(*color_int)
-            })
+        # 1. 색상 분석 + 데이터 구조화 (같은 이미지/옵션이면 캐시 사용)
+        hist, centers = analyze_colors(file_bytes, k_value, resize_quality, fast_mode)
+        data_list = build_color_table(file_bytes, k_value, resize_quality, fast_mode)
 
         with col2:
-            st.subheader("📊 분석 컨트롤 패널")
-            # --- 정렬 버튼 ---
-            sort_option = st.radio(
-                "정렬 기준 선택:",
-                ("색상 분포(%) 많은 순", "에너지(eV) 높은 순"),
-                horizontal=True
-            )
-
-            # 데이터 정렬 로직
-            if sort_option == "에너지(eV) 높은 순":
-                sorted_data = sorted(data_list, key=lambda x: x['energy'], reverse=True)
-                sort_label = "Rank"
-            else:
-                sorted_data = sorted(data_list, key=lambda x: x['percent'], reverse=True)
-                sort_label = "Rank"
-
-            # --- 탭 구성 ---
-            tab1, tab2 = st.tabs(["⚡ 에너지 그래프", "🎨 색상 스펙트럼 & 상세"])
-
-            with tab1:
-                # [탭 1] 에너지 막대 그래프
-                fig_bar, ax_bar = plt.subplots(figsize=(8, 6))
-                fig_bar.patch.set_facecolor('#f0f2f6')
-                ax_bar.set_facecolor('#f0f2f6')
-                
-                plot_energies = [d['energy'] for d in sorted_data]
-                plot_colors = [d['color']/255 for d in sorted_data]
-                plot_labels = [f"{d['hex']}" for d in sorted_data] # 라벨을 색상코드로 변경
-
-                y_pos = np.arange(len(sorted_data))
-                ax_bar.barh(y_pos, plot_energies, color=plot_colors, height=0.6)
-                ax_bar.set_yticks(y_pos)
-                ax_bar.set_yticklabels(plot_labels)
-                ax_bar.invert_yaxis() 
-                
-                ax_bar.set_xlabel("광자 에너지 (eV)")
-                ax_bar.set_title(f"색상별 에너지 ({sort_option})")
-                
-                st.pyplot(fig_bar)
-                
-                # 간단 요약
-                max_e = max(d['energy'] for d in data_list)
-                min_e = min(d['energy'] for d in data_list)
-                st.info(f"이 사진의 에너지 범위는 **{min_e:.2f} eV** ~ **{max_e:.2f} eV** 입니다.")
-
-            with tab2:
-                # [탭 2] 스펙트럼 바 + 상세 리스트
-                st.write("**🌈 색상 분포 스펙트럼**")
-                # 스펙트럼 바는 전체 분포를 보여주므로 항상 % 순으로 생성
-                bar_image = plot_bar(hist, centers)
-                st.image(bar_image, use_column_width=True)
-                
-                st.write(f"**📝 상세 데이터 ({sort_option})**")
-                
-                # 리스트 출력 (선택한 정렬 기준에 따름)
-                for item in sorted_data:
-                    st.markdown(
-                        f"""
-                        <div style="
-                            display: flex; 
-                            align-items: center; 
-                            margin-bottom: 8px; 
-                            padding: 10px; 
-                            background-color: white; 
-                            border-radius: 5px; 
-                            box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
-                            <div style="
-                                width: 40px; 
-                                height: 40px; 
-                                background-color: {item['hex']}; 
-                                border: 1px solid #ddd; 
-                                margin-right: 15px; 
-                                border-radius: 4px;">
-                            </div>
-                            <div style="font-family: monospace; color: #333; width: 100%;">
-                                <div style="display: flex; justify-content: space-between;">
-                                    <span style="font-weight: bold; font-size: 1.1em;">{item['hex']}</span>
-                                    <span style="color: #666;">점유율: {item['percent']*100:.1f}%</span>
-                                </div>
-                                <div style="margin-top: 4px; font-size: 0.9em;">
-                                    파장: {item['wavelength']:.1f} nm │ <span style="color: #d63031; font-weight: bold;">에너지: {item['energy']:.3f} eV</span>
-                                </div>
-                            </div>
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
+            # 정렬/탭 조작은 fragment 내부만 다시 실행 (분석 파이프라인과 분리)
+            render_panel(data_list, hist, centers)